@@ -1,20 +1,34 @@
 from __future__ import annotations
 
 import atexit
+import contextlib
+import gzip
 import hashlib
-import json
+import heapq
 import logging
 import os
 import re
+import tempfile
 import threading
-from datetime import date, datetime, timedelta
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are only serialized within one process.
+    fcntl = None
+
+import orjson
 import requests
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
+from flask.json.provider import JSONProvider
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -22,6 +36,8 @@ BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR / "static"
 DATA_DIR = BASE_DIR / "data"
 CACHE_FILE = DATA_DIR / "events_cache.json"
+REFRESH_LOCK_FILE = DATA_DIR / ".refresh.lock"
+CATCH_UP_LOCK_FILE = DATA_DIR / ".catch_up.lock"
 STOCK_CONFIG_FILE = BASE_DIR / "stocks.json"
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -48,7 +64,8 @@ retry = Retry(
     status_forcelist=[429, 500, 502, 503, 504],
     allowed_methods=frozenset(["GET"]),
 )
-adapter = HTTPAdapter(max_retries=retry)
+# Pool sized for the concurrent per-stock and per-page fetch workers below.
+adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
 SESSION.mount("https://", adapter)
 SESSION.mount("http://", adapter)
 
@@ -58,12 +75,20 @@ MACRO_FASTNEWS_ENDPOINT = "https://np-weblist.eastmoney.com/comm/web/getFastNews
 SEARCH_SUGGEST_ENDPOINT = "https://searchapi.eastmoney.com/api/suggest/get"
 MACRO_FAST_COLUMNS = "125,126,127,128,129,130,131"
 MACRO_MAX_PAGES = 12
+MACRO_FASTNEWS_LIMIT = 80
+REFRESH_INTERVAL_HOURS = 6
+# Set AUTO_REFRESH=0 when several workers serve the app and an external timer
+# (cron/systemd) POSTs /api/refresh instead of every worker refreshing itself.
+AUTO_REFRESH = os.getenv("AUTO_REFRESH", "1") != "0"
+HTTP_CACHE_MAX_ENTRIES = 512
+STOCK_FETCH_WORKERS = 16
+PAGE_FETCH_WORKERS = 8
 
 # Public repo keeps stock config empty by default.
 # Users should create local stocks.json (or save from UI) for their own watchlist.
 DEFAULT_STOCKS: list[dict[str, str]] = []
 
-A_REPORT_COLUMNS = {
+A_REPORT_COLUMNS = frozenset({
     "年度报告全文",
     "年度报告摘要",
     "年度报告全文(英文)",
@@ -72,39 +97,91 @@ A_REPORT_COLUMNS = {
     "一季度报告全文",
     "三季度报告全文",
     "季度报告全文",
+})
+
+SUFFIX_TO_MKT_NUMS = {
+    "XSHE": {"0"},
+    "XSHG": {"1"},
+    "XHKG": {"116"},
+    "US": {"105"},
+    "XNAS": {"105"},
+    "XNYS": {"105"},
 }
 
+HK_CODE_PATTERN = re.compile(r"\d{5}")
+A_CODE_PATTERN = re.compile(r"\d{6}")
+US_CODE_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9._-]{0,11}")
+NON_DIGIT_PATTERN = re.compile(r"\D")
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
 HK_EARNINGS_PATTERN = re.compile(r"(业绩公告|年度业绩|中期业绩|季度业绩|董事会会议召开日期)", re.IGNORECASE)
-US_TITLE_PATTERN = re.compile(r"(earnings|financial results|10-q|10-k|业绩)", re.IGNORECASE)
-US_REPORT_COLUMNS = {"10-Q", "10-K", "8-K 2.02", "PRESENTATION"}
+# Matched against the lowercased title, like the macro patterns below.
+US_TITLE_PATTERN = re.compile(r"(earnings|financial results|10-q|10-k|业绩)")
+# Checked in this order; the first column present decides the US event type.
+US_REPORT_TYPES = {
+    "10-K": "10-K 年度报告",
+    "10-Q": "10-Q 季度报告",
+    "8-K 2.02": "8-K 业绩披露",
+    "PRESENTATION": "业绩演示文稿",
+}
+US_REPORT_COLUMNS = frozenset(US_REPORT_TYPES)
 
+# Macro patterns are written in lowercase and matched against lowercased text:
+# one str.lower() per headline is much cheaper than IGNORECASE on every search.
 MACRO_MARKET_PATTERNS = [
-    ("港股", re.compile(r"(香港|港元|香港特区|金管局)", re.IGNORECASE)),
-    ("美股", re.compile(r"(美国|美联储|华尔街|非农|初请失业金|ADP)", re.IGNORECASE)),
-    ("A股", re.compile(r"(中国|国家统计局|中国人民银行|全国城镇|内地|国务院)", re.IGNORECASE)),
+    ("港股", re.compile(r"(香港|港元|香港特区|金管局)")),
+    ("美股", re.compile(r"(美国|美联储|华尔街|非农|初请失业金|adp)")),
+    ("A股", re.compile(r"(中国|国家统计局|中国人民银行|全国城镇|内地|国务院)")),
 ]
 
 MACRO_PATTERNS = [
-    ("就业率/就业数据", re.compile(r"(失业|就业|非农|初请失业金|adp|unemployment|employment|jobless)", re.IGNORECASE)),
-    ("PMI", re.compile(r"(PMI|采购经理)", re.IGNORECASE)),
-    ("CPI", re.compile(r"(CPI|消费者物价|通胀|inflation)", re.IGNORECASE)),
-    ("GDP", re.compile(r"(GDP|国内生产总值|gross domestic product)", re.IGNORECASE)),
-    (
-        "住宅价格",
-        re.compile(
-            r"(房价|住宅|新屋销售|成屋销售|case-shiller|s&p/cs|fhfa|home\s*price|house\s*price)",
-            re.IGNORECASE,
-        ),
-    ),
+    ("就业率/就业数据", re.compile(r"(失业|就业|非农|初请失业金|adp|unemployment|employment|jobless)")),
+    ("PMI", re.compile(r"(pmi|采购经理)")),
+    ("CPI", re.compile(r"(cpi|消费者物价|通胀|inflation)")),
+    ("GDP", re.compile(r"(gdp|国内生产总值|gross domestic product)")),
+    ("住宅价格", re.compile(r"(房价|住宅|新屋销售|成屋销售|case-shiller|s&p/cs|fhfa|home\s*price|house\s*price)")),
 ]
 
-MACRO_RELEASE_HINT_PATTERN = re.compile(
-    r"(指数|数据|同比|环比|录得|公布|预期|前值|上涨|下降|增加|减少|百分点|万人|%|pct)",
-    re.IGNORECASE,
+MACRO_COMMENTARY_PATTERN = re.compile(r"[？?]|前瞻|解读|点评|缘何|驳斥|观察|速览|展望|专访|怎么看|重磅来袭|心跳时刻")
+# Publisher prefix ("国家统计局：") or a release hint word; either one marks a release.
+MACRO_RELEASE_PATTERN = re.compile(
+    r"(?:国家统计局|美国劳工部|ADP|中国人民银行|香港特区政府统计处|FHFA|Case-Shiller)\s*[：:]"
+    r"|指数|数据|同比|环比|录得|公布|预期|前值|上涨|下降|增加|减少|百分点|万人|%|(?i:pct)"
 )
+MACRO_VALUE_UNIT_PATTERN = re.compile(r"%|万人|万|亿|点|同比|环比|指数|初值|终值|前值|预期")
+DIGIT_PATTERN = re.compile(r"\d")
+
+# Every event producer sets "start" and "title" as strings, so sorting needs no coercion.
+EVENT_SORT_KEY = itemgetter("start", "title")
 
 CACHE_LOCK = threading.Lock()
 
+# Parsed stocks.json keyed by (st_mtime_ns, st_size); separate from CACHE_LOCK,
+# which refresh_cache holds while it calls load_stocks().
+STOCKS_LOCK = threading.Lock()
+STOCKS_CACHE: tuple[tuple[int, int], list[dict[str, str]]] | None = None
+
+# Parsed events cache keyed like STOCKS_CACHE; CACHE_LOCK only serializes writers,
+# readers just compare the file key and reuse the parsed payload.
+CACHE_SNAPSHOT_LOCK = threading.Lock()
+CACHE_SNAPSHOT: tuple[tuple[int, int], dict[str, Any]] | None = None
+
+# YYYY-MM-DD start keys for the events list last filtered, matched by identity
+# with the list held in the served payload so they are built once per refresh.
+EVENT_START_KEYS: tuple[list[dict[str, Any]], list[str]] | None = None
+
+# Serialized (plain, gzipped) unfiltered /api/events body and its ETag for the
+# payload it was built from, matched by identity like EVENT_START_KEYS.
+EVENTS_BODY: tuple[dict[str, Any], bytes, bytes, str] | None = None
+
+# Conditional GET validators and parsed payload per (url, params), oldest first.
+HTTP_CACHE_LOCK = threading.Lock()
+HTTP_CACHE: dict[tuple[str, tuple[tuple[str, str], ...]], tuple[dict[str, str], dict[str, Any]]] = {}
+
+# Shared pool for follow-up pages once page 1 has told us the page count.
+# Kept separate from the per-stock pool so nested submits cannot starve it.
+PAGE_EXECUTOR = ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS, thread_name_prefix="page-fetch")
+
 
 def normalize_stock(item: dict[str, Any]) -> dict[str, str] | None:
     name = str(item.get("name", "")).strip()
@@ -132,14 +209,14 @@ def normalize_stock(item: dict[str, Any]) -> dict[str, str] | None:
 
     if not market_code or not market:
         # fallback: infer by code pattern
-        if re.fullmatch(r"\d{5}", code):
+        if HK_CODE_PATTERN.fullmatch(code):
             market_code, market = "116", "港股"
-        elif re.fullmatch(r"\d{6}", code):
+        elif A_CODE_PATTERN.fullmatch(code):
             if code.startswith(("5", "6", "9")):
                 market_code, market = "1", "A股"
             else:
                 market_code, market = "0", "A股"
-        elif re.fullmatch(r"[A-Za-z][A-Za-z0-9._-]{0,11}", code):
+        elif US_CODE_PATTERN.fullmatch(code):
             market_code, market = "105", "美股"
             code = code.upper()
         else:
@@ -153,12 +230,9 @@ def normalize_stock(item: dict[str, Any]) -> dict[str, str] | None:
     }
 
 
-def load_stocks() -> list[dict[str, str]]:
-    if not STOCK_CONFIG_FILE.exists():
-        return DEFAULT_STOCKS
-
+def read_stocks_config() -> list[dict[str, str]]:
     try:
-        payload = json.loads(STOCK_CONFIG_FILE.read_text(encoding="utf-8"))
+        payload = orjson.loads(STOCK_CONFIG_FILE.read_bytes())
         if isinstance(payload, list):
             valid = []
             for item in payload:
@@ -175,7 +249,34 @@ def load_stocks() -> list[dict[str, str]]:
     return DEFAULT_STOCKS
 
 
+def file_cache_key(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_stocks() -> list[dict[str, str]]:
+    global STOCKS_CACHE
+
+    key = file_cache_key(STOCK_CONFIG_FILE)
+    if key is None:
+        return DEFAULT_STOCKS
+
+    with STOCKS_LOCK:
+        if STOCKS_CACHE and STOCKS_CACHE[0] == key:
+            return STOCKS_CACHE[1]
+
+    stocks = read_stocks_config()
+    with STOCKS_LOCK:
+        STOCKS_CACHE = (key, stocks)
+    return stocks
+
+
 def save_stocks_config(stocks_input: list[dict[str, Any]]) -> list[dict[str, str]]:
+    global STOCKS_CACHE
+
     normalized: list[dict[str, str]] = []
     seen: set[tuple[str, str]] = set()
 
@@ -194,10 +295,12 @@ def save_stocks_config(stocks_input: list[dict[str, Any]]) -> list[dict[str, str
     if not normalized:
         raise ValueError("股票列表为空或格式无效")
 
-    STOCK_CONFIG_FILE.write_text(
-        json.dumps(normalized, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    STOCK_CONFIG_FILE.write_bytes(orjson.dumps(normalized, option=orjson.OPT_INDENT_2))
+
+    key = file_cache_key(STOCK_CONFIG_FILE)
+    if key is not None:
+        with STOCKS_LOCK:
+            STOCKS_CACHE = (key, normalized)
     return normalized
 
 
@@ -205,11 +308,43 @@ def request_json(url: str, params: dict[str, Any], timeout: int = 30) -> dict[st
     try:
         response = SESSION.get(url, params=params, timeout=timeout)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
+    except Exception:
+        logging.exception("Request failed: %s", url)
+        return None
+
+
+def request_json_conditional(url: str, params: dict[str, Any], timeout: int = 30) -> dict[str, Any] | None:
+    # Revalidates with the ETag/Last-Modified of the previous response, if the
+    # server sent any, and reuses the already parsed payload on 304.
+    key = (url, tuple(sorted((name, str(value)) for name, value in params.items())))
+    with HTTP_CACHE_LOCK:
+        cached = HTTP_CACHE.get(key)
+
+    try:
+        response = SESSION.get(url, params=params, headers=cached[0] if cached else None, timeout=timeout)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        payload = orjson.loads(response.content)
     except Exception:
         logging.exception("Request failed: %s", url)
         return None
 
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["If-None-Match"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["If-Modified-Since"] = response.headers["Last-Modified"]
+
+    with HTTP_CACHE_LOCK:
+        HTTP_CACHE.pop(key, None)
+        if validators:
+            HTTP_CACHE[key] = (validators, payload)
+            while len(HTTP_CACHE) > HTTP_CACHE_MAX_ENTRIES:
+                HTTP_CACHE.pop(next(iter(HTTP_CACHE)))
+    return payload
+
 
 def market_from_mkt_num(mkt_num: str) -> str | None:
     if mkt_num in {"0", "1"}:
@@ -250,13 +385,13 @@ def display_code_for_mkt_num(code: str, mkt_num: str) -> str:
         return raw
 
     if mkt_num == "0":
-        digits = re.sub(r"\D", "", raw)
+        digits = NON_DIGIT_PATTERN.sub("", raw)
         return f"{digits.zfill(6)}.XSHE" if digits else raw
     if mkt_num == "1":
-        digits = re.sub(r"\D", "", raw)
+        digits = NON_DIGIT_PATTERN.sub("", raw)
         return f"{digits.zfill(6)}.XSHG" if digits else raw
     if mkt_num == "116":
-        digits = re.sub(r"\D", "", raw)
+        digits = NON_DIGIT_PATTERN.sub("", raw)
         return f"{digits.zfill(5)}.XHKG" if digits else raw
     if mkt_num in {"105", "106", "107"}:
         return f"{raw}.US"
@@ -279,17 +414,8 @@ def resolve_stock_by_query(query: str, group: str | None = None) -> dict[str, st
         return None
 
     query_code, query_suffix = strip_known_suffix(query_raw)
-    allowed_mkt_nums = mkt_num_set_from_group(group)
-    suffix_to_mkt = {
-        "XSHE": {"0"},
-        "XSHG": {"1"},
-        "XHKG": {"116"},
-        "US": {"105"},
-        "XNAS": {"105"},
-        "XNYS": {"105"},
-    }
-    if query_suffix in suffix_to_mkt:
-        allowed_mkt_nums = suffix_to_mkt[query_suffix]
+    allowed_mkt_nums = SUFFIX_TO_MKT_NUMS.get(query_suffix) or mkt_num_set_from_group(group)
+    preferred_mkt_nums = mkt_num_set_from_group(group) if group else set()
 
     payload = request_json(
         SEARCH_SUGGEST_ENDPOINT,
@@ -349,7 +475,7 @@ def resolve_stock_by_query(query: str, group: str | None = None) -> dict[str, st
         elif query_upper and pinyin.startswith(query_upper):
             score += 35
 
-        if group and mkt_num in mkt_num_set_from_group(group):
+        if mkt_num in preferred_mkt_nums:
             score += 5
 
         if score > best_score:
@@ -381,8 +507,7 @@ def to_date_str(value: Any) -> str | None:
     if value is None:
         return None
 
-    raw = str(value)
-    match = re.search(r"\d{4}-\d{2}-\d{2}", raw)
+    match = DATE_PATTERN.search(str(value))
     return match.group(0) if match else None
 
 
@@ -391,18 +516,28 @@ def parse_date(value: Any) -> date | None:
     if not text:
         return None
     try:
-        return datetime.strptime(text, "%Y-%m-%d").date()
+        return date.fromisoformat(text)
     except ValueError:
         return None
 
 
-def get_columns(item: dict[str, Any]) -> set[str]:
-    cols = set()
+def get_columns(item: dict[str, Any]) -> frozenset[str]:
+    names = (str(column.get("column_name", "")).strip() for column in item.get("columns", []) or [])
+    return frozenset(name for name in names if name)
+
+
+def first_column_in(item: dict[str, Any], targets: frozenset[str]) -> str | None:
+    # Stops at the first hit without building the full column set.
     for column in item.get("columns", []) or []:
         name = str(column.get("column_name", "")).strip()
-        if name:
-            cols.add(name)
-    return cols
+        if name in targets:
+            return name
+    return None
+
+
+def short_hash(text: str, length: int = 10) -> str:
+    # Only tags event ids to keep them unique; no cryptographic property is needed.
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=length // 2).hexdigest()
 
 
 def notice_detail_url(stock_code: str, art_code: str) -> str:
@@ -423,7 +558,8 @@ def build_notice_event(
     if not title:
         return None
 
-    clean_title = title.split("|", 1)[-1].strip() if "|" in title else title
+    _, separator, tail = title.partition("|")
+    clean_title = tail.strip() if separator else title
     event_id = f"stock:{stock['code']}:{art_code}:{event_type}"
     source_url = notice_detail_url(stock["code"], art_code) if art_code else ""
 
@@ -443,11 +579,8 @@ def build_notice_event(
 
 
 def fetch_announcements(stock: dict[str, str], max_pages: int = 8) -> list[dict[str, Any]]:
-    page_index = 1
-    records: list[dict[str, Any]] = []
-
-    while page_index <= max_pages:
-        payload = request_json(
+    def fetch_page(page_index: int) -> dict[str, Any]:
+        payload = request_json_conditional(
             NOTICE_ENDPOINT,
             {
                 "page_size": 100,
@@ -457,61 +590,69 @@ def fetch_announcements(stock: dict[str, str], max_pages: int = 8) -> list[dict[
                 "client_source": "web",
             },
         )
+        return (payload or {}).get("data") or {}
 
-        data = (payload or {}).get("data") or {}
+    first = fetch_page(1)
+    records: list[dict[str, Any]] = list(first.get("list") or [])
+    if not records:
+        return records
+
+    page_count = min(int(first.get("page_count") or 1), max_pages)
+    for data in PAGE_EXECUTOR.map(fetch_page, range(2, page_count + 1)):
         entries = data.get("list") or []
         if not entries:
             break
-
         records.extend(entries)
-        page_count = int(data.get("page_count") or 1)
-        if page_index >= page_count:
-            break
-
-        page_index += 1
 
     return records
 
 
+def a_share_report_type(item: dict[str, Any]) -> str | None:
+    if first_column_in(item, A_REPORT_COLUMNS):
+        return "财报公告"
+    return None
+
+
+def hk_report_type(item: dict[str, Any]) -> str | None:
+    title = str(item.get("title_ch") or item.get("title") or "")
+    if not HK_EARNINGS_PATTERN.search(title):
+        return None
+    if "董事会会议召开日期" in title:
+        return "董事会会议（财报相关）"
+    return "业绩公告"
+
+
+def us_report_type(item: dict[str, Any]) -> str | None:
+    if not first_column_in(item, US_REPORT_COLUMNS):
+        title = str(item.get("title_ch") or item.get("title") or "")
+        return "财报相关公告" if US_TITLE_PATTERN.search(title.lower()) else None
+
+    # Several report columns can be present; the type table decides precedence.
+    columns = get_columns(item)
+    for column, event_type in US_REPORT_TYPES.items():
+        if column in columns:
+            return event_type
+    return "财报相关公告"
+
+
+# Picked once per stock so the per-notice loop only does the work its market needs.
+REPORT_TYPE_BY_MARKET_CODE = {
+    "0": a_share_report_type,
+    "1": a_share_report_type,
+    "116": hk_report_type,
+    "105": us_report_type,
+}
+
+
 def filter_stock_report_events(stock: dict[str, str], entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    events: list[dict[str, Any]] = []
-    market_code = stock["market_code"]
+    report_type = REPORT_TYPE_BY_MARKET_CODE.get(stock["market_code"])
+    if not report_type:
+        return []
 
+    events: list[dict[str, Any]] = []
     for item in entries:
-        title = str(item.get("title_ch") or item.get("title") or "")
-        columns = get_columns(item)
-
-        include = False
-        event_type = "财报公告"
-
-        if market_code in {"0", "1"}:
-            if columns & A_REPORT_COLUMNS:
-                include = True
-                event_type = "财报公告"
-
-        elif market_code == "116":
-            if HK_EARNINGS_PATTERN.search(title):
-                include = True
-                if "董事会会议召开日期" in title:
-                    event_type = "董事会会议（财报相关）"
-                else:
-                    event_type = "业绩公告"
-
-        elif market_code == "105":
-            if columns & US_REPORT_COLUMNS or US_TITLE_PATTERN.search(title):
-                include = True
-                if "10-K" in columns:
-                    event_type = "10-K 年度报告"
-                elif "10-Q" in columns:
-                    event_type = "10-Q 季度报告"
-                elif "8-K 2.02" in columns:
-                    event_type = "8-K 业绩披露"
-                elif "PRESENTATION" in columns:
-                    event_type = "业绩演示文稿"
-                else:
-                    event_type = "财报相关公告"
-
-        if not include:
+        event_type = report_type(item)
+        if not event_type:
             continue
 
         event = build_notice_event(stock, item, event_type)
@@ -521,22 +662,17 @@ def filter_stock_report_events(stock: dict[str, str], entries: list[dict[str, An
     return events
 
 
-def fetch_a_share_appointments(stock: dict[str, str]) -> list[dict[str, Any]]:
+def fetch_a_share_appointments(stock: dict[str, str], max_pages: int = 5) -> list[dict[str, Any]]:
     if stock["market_code"] not in {"0", "1"}:
         return []
 
-    rows: list[dict[str, Any]] = []
-    page_number = 1
-
-    while page_number <= 5:
-        payload = request_json(
+    def fetch_page(page_number: int) -> dict[str, Any]:
+        payload = request_json_conditional(
             A_SHARE_CALENDAR_ENDPOINT,
             {
                 "reportName": "RPT_STOCKCALENDAR",
-                "columns": (
-                    "SECUCODE,SECURITY_CODE,SECURITY_INNER_CODE,ORG_CODE,NOTICE_DATE,"
-                    "INFO_CODE,EVENT_TYPE,EVENT_TYPE_CODE,LEVEL1_CONTENT"
-                ),
+                # Only the fields read below, to keep pages small to transfer and parse.
+                "columns": "SECURITY_CODE,NOTICE_DATE,LEVEL1_CONTENT",
                 "quoteColumns": "",
                 "filter": f'(SECURITY_CODE="{stock["code"]}")(EVENT_TYPE_CODE in ("006"))',
                 "pageNumber": page_number,
@@ -547,18 +683,17 @@ def fetch_a_share_appointments(stock: dict[str, str]) -> list[dict[str, Any]]:
                 "client": "WEB",
             },
         )
-
-        result = (payload or {}).get("result") or {}
-        data = result.get("data") or []
-        if not data:
-            break
-
-        rows.extend(data)
-        pages = int(result.get("pages") or 1)
-        if page_number >= pages:
-            break
-
-        page_number += 1
+        return (payload or {}).get("result") or {}
+
+    first = fetch_page(1)
+    rows: list[dict[str, Any]] = list(first.get("data") or [])
+    if rows:
+        pages = min(int(first.get("pages") or 1), max_pages)
+        for result in PAGE_EXECUTOR.map(fetch_page, range(2, pages + 1)):
+            data = result.get("data") or []
+            if not data:
+                break
+            rows.extend(data)
 
     today = date.today()
     horizon = today + timedelta(days=365)
@@ -572,15 +707,16 @@ def fetch_a_share_appointments(stock: dict[str, str]) -> list[dict[str, Any]]:
             continue
 
         level1 = str(row.get("LEVEL1_CONTENT") or "财报预约披露日").strip()
-        hash_part = hashlib.md5(level1.encode("utf-8")).hexdigest()[:8]
-        event_id = f"stock:{stock['code']}:appointment:{notice_date.isoformat()}:{hash_part}"
+        hash_part = short_hash(level1, 8)
+        start = notice_date.isoformat()
+        event_id = f"stock:{stock['code']}:appointment:{start}:{hash_part}"
 
         events.append(
             {
                 "id": event_id,
                 "category": "stock",
                 "title": f"{stock['name']} · {level1}",
-                "start": notice_date.isoformat(),
+                "start": start,
                 "allDay": True,
                 "market": stock["market"],
                 "stockCode": stock["code"],
@@ -595,6 +731,7 @@ def fetch_a_share_appointments(stock: dict[str, str]) -> list[dict[str, Any]]:
 
 
 def classify_macro_event(title: str) -> str | None:
+    title = title.lower()
     for name, pattern in MACRO_PATTERNS:
         if pattern.search(title):
             return name
@@ -602,6 +739,7 @@ def classify_macro_event(title: str) -> str | None:
 
 
 def classify_macro_market(text: str) -> str | None:
+    text = text.lower()
     for market, pattern in MACRO_MARKET_PATTERNS:
         if pattern.search(text):
             return market
@@ -621,17 +759,14 @@ def parse_macro_start(show_time: str) -> str | None:
 
 def is_macro_release_text(text: str) -> bool:
     # Filter out commentary-style headlines and keep release-like messages.
-    if re.search(r"[？?]", text):
-        return False
-    if re.search(r"(前瞻|解读|点评|缘何|驳斥|观察|速览|展望|专访|怎么看|重磅来袭|心跳时刻)", text):
+    if MACRO_COMMENTARY_PATTERN.search(text):
         return False
-    if re.search(r"\d", text) and re.search(r"(%|万人|万|亿|点|同比|环比|指数|初值|终值|前值|预期)", text):
+    if MACRO_RELEASE_PATTERN.search(text):
         return True
-    if re.search(r"(国家统计局|美国劳工部|ADP|中国人民银行|香港特区政府统计处|FHFA|Case-Shiller)\s*[：:]", text):
-        return True
-    return bool(MACRO_RELEASE_HINT_PATTERN.search(text))
+    return bool(DIGIT_PATTERN.search(text) and MACRO_VALUE_UNIT_PATTERN.search(text))
 
 
+@lru_cache(maxsize=None)
 def add_months(year: int, month: int, offset: int) -> tuple[int, int]:
     total = year * 12 + (month - 1) + offset
     return total // 12, total % 12 + 1
@@ -652,22 +787,26 @@ def adjust_business_day(day: date, forward: bool = True) -> date:
     return result
 
 
+@lru_cache(maxsize=None)
 def first_business_day(year: int, month: int) -> date:
     return adjust_business_day(date(year, month, 1), forward=True)
 
 
+@lru_cache(maxsize=None)
 def last_business_day(year: int, month: int) -> date:
     next_year, next_month = add_months(year, month, 1)
     last = date(next_year, next_month, 1) - timedelta(days=1)
     return adjust_business_day(last, forward=False)
 
 
+@lru_cache(maxsize=None)
 def nth_weekday_of_month(year: int, month: int, weekday: int, nth: int) -> date:
     first = date(year, month, 1)
     shift = (weekday - first.weekday()) % 7
     return first + timedelta(days=shift + 7 * (nth - 1))
 
 
+@lru_cache(maxsize=None)
 def first_weekday_of_month(year: int, month: int, weekday: int) -> date:
     return nth_weekday_of_month(year, month, weekday, 1)
 
@@ -686,12 +825,13 @@ def make_macro_forecast_event(
     source_url: str,
     source_label: str,
 ) -> dict[str, Any]:
-    hash_part = hashlib.md5(f"{market}|{event_type}|{title}|{start_day.isoformat()}".encode("utf-8")).hexdigest()[:10]
+    start = start_day.isoformat()
+    hash_part = short_hash("|".join((market, event_type, title, start)))
     return {
-        "id": f"macrof:{market}:{event_type}:{start_day.isoformat()}:{hash_part}",
+        "id": f"macrof:{market}:{event_type}:{start}:{hash_part}",
         "category": "macro",
         "title": title,
-        "start": start_day.isoformat(),
+        "start": start,
         "allDay": True,
         "market": market,
         "stockCode": "",
@@ -706,7 +846,8 @@ def make_macro_forecast_event(
 def build_macro_forecast_events(months_ahead: int = 12) -> list[dict[str, Any]]:
     today = date.today()
     horizon = today + timedelta(days=months_ahead * 32)
-    events: list[dict[str, Any]] = []
+    # Keyed by id so repeated windows collapse as they are generated.
+    events: dict[str, dict[str, Any]] = {}
 
     def add_event(
         *,
@@ -720,17 +861,16 @@ def build_macro_forecast_events(months_ahead: int = 12) -> list[dict[str, Any]]:
     ) -> None:
         if not in_horizon(day, today, horizon):
             return
-        events.append(
-            make_macro_forecast_event(
-                market=market,
-                event_type=event_type,
-                title=title,
-                start_day=day,
-                description=description,
-                source_url=source_url,
-                source_label=source_label,
-            )
+        event = make_macro_forecast_event(
+            market=market,
+            event_type=event_type,
+            title=title,
+            start_day=day,
+            description=description,
+            source_url=source_url,
+            source_label=source_label,
         )
+        events.setdefault(event["id"], event)
 
     months = iter_months(today, months_ahead + 2)
 
@@ -884,32 +1024,42 @@ def build_macro_forecast_events(months_ahead: int = 12) -> list[dict[str, Any]]:
                 source_label="BEA 发布日历",
             )
 
-    return dedupe_and_sort(events)
+    return sorted(events.values(), key=EVENT_SORT_KEY)
+
+
+def fetch_macro_fastnews_page(page: int, sort_end: str) -> dict[str, Any]:
+    payload = request_json(
+        MACRO_FASTNEWS_ENDPOINT,
+        {
+            "client": "web",
+            "biz": "web_724",
+            "fastColumn": MACRO_FAST_COLUMNS,
+            "sortEnd": sort_end,
+            "pageSize": 100,
+            "req_trace": f"macro_{page}_{int(time.time())}",
+        },
+    )
+    return (payload or {}).get("data") or {}
 
 
 def fetch_macro_fastnews_events() -> list[dict[str, Any]]:
     events: list[dict[str, Any]] = []
-    sort_end = ""
-    oldest_allowed = date.today() - timedelta(days=120)
+    oldest_allowed = (date.today() - timedelta(days=120)).isoformat()
 
+    # Pages chain through the server-issued sortEnd cursor, so they cannot be
+    # requested up front; instead the next page is fetched while this one is parsed.
+    data = fetch_macro_fastnews_page(0, "")
     for page in range(MACRO_MAX_PAGES):
-        payload = request_json(
-            MACRO_FASTNEWS_ENDPOINT,
-            {
-                "client": "web",
-                "biz": "web_724",
-                "fastColumn": MACRO_FAST_COLUMNS,
-                "sortEnd": sort_end,
-                "pageSize": 100,
-                "req_trace": f"macro_{page}_{int(datetime.utcnow().timestamp())}",
-            },
-        )
-
-        data = (payload or {}).get("data") or {}
         items = data.get("fastNewsList") or []
         if not items:
             break
 
+        next_page = None
+        sort_end = str(data.get("sortEnd") or "").strip()
+        last_day = to_date_str(items[-1].get("showTime"))
+        if sort_end and not (last_day and last_day < oldest_allowed) and page + 1 < MACRO_MAX_PAGES:
+            next_page = PAGE_EXECUTOR.submit(fetch_macro_fastnews_page, page + 1, sort_end)
+
         for item in items:
             title = str(item.get("title") or "").strip()
             summary = str(item.get("summary") or "").strip()
@@ -930,8 +1080,7 @@ def fetch_macro_fastnews_events() -> list[dict[str, Any]]:
             start = parse_macro_start(str(item.get("showTime") or ""))
             if not start:
                 continue
-            event_day = parse_date(start)
-            if event_day and event_day < oldest_allowed:
+            if start[:10] < oldest_allowed:
                 continue
 
             code = str(item.get("code") or "").strip()
@@ -954,14 +1103,11 @@ def fetch_macro_fastnews_events() -> list[dict[str, Any]]:
                 }
             )
 
-        sort_end = str(data.get("sortEnd") or "").strip()
-        if not sort_end:
-            break
-        last_day = parse_date(items[-1].get("showTime"))
-        if last_day and last_day < oldest_allowed:
+        if next_page is None or len(events) >= MACRO_FASTNEWS_LIMIT:
             break
+        data = next_page.result()
 
-    return events[:80]
+    return events[:MACRO_FASTNEWS_LIMIT]
 
 
 def fetch_macro_events() -> list[dict[str, Any]]:
@@ -971,53 +1117,125 @@ def fetch_macro_events() -> list[dict[str, Any]]:
 
 
 def dedupe_and_sort(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    deduped: dict[str, dict[str, Any]] = {}
-    for event in events:
-        deduped[event["id"]] = event
+    # Later events win on duplicate ids.
+    deduped = {event["id"]: event for event in events}
 
-    def sort_key(item: dict[str, Any]) -> tuple[str, str]:
-        return str(item.get("start", "")), str(item.get("title", ""))
-
-    return sorted(deduped.values(), key=sort_key)
+    return sorted(deduped.values(), key=EVENT_SORT_KEY)
 
 
 def load_cache() -> dict[str, Any]:
-    if not CACHE_FILE.exists():
+    global CACHE_SNAPSHOT
+
+    key = file_cache_key(CACHE_FILE)
+    if key is None:
         return {"updatedAt": None, "events": []}
 
+    with CACHE_SNAPSHOT_LOCK:
+        if CACHE_SNAPSHOT and CACHE_SNAPSHOT[0] == key:
+            return CACHE_SNAPSHOT[1]
+
     try:
-        return json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+        payload = orjson.loads(CACHE_FILE.read_bytes())
     except Exception:
         logging.exception("Failed to read cache file")
         return {"updatedAt": None, "events": []}
 
+    with CACHE_SNAPSHOT_LOCK:
+        CACHE_SNAPSHOT = (key, payload)
+    return payload
+
 
 def save_cache(payload: dict[str, Any]) -> None:
-    temp_file = CACHE_FILE.with_suffix(".tmp")
-    temp_file.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    temp_file.replace(CACHE_FILE)
+    global CACHE_SNAPSHOT
+
+    # Readers only ever see a complete file: write aside, flush it to disk, then
+    # atomically rename over and sync the directory so the rename survives a crash.
+    # Each writer gets its own temp file, since CACHE_LOCK does not cover other
+    # worker processes sharing DATA_DIR.
+    fd, temp_name = tempfile.mkstemp(dir=CACHE_FILE.parent, prefix=".events_cache.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(orjson.dumps(payload))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_name, CACHE_FILE)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_name)
+        raise
+    if os.name == "posix":
+        dir_fd = os.open(CACHE_FILE.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    # Prime the snapshot so the next reader does not re-parse what we just wrote.
+    key = file_cache_key(CACHE_FILE)
+    if key is not None:
+        with CACHE_SNAPSHOT_LOCK:
+            CACHE_SNAPSHOT = (key, payload)
+
+
+def collect_events_for_stock(stock: dict[str, str]) -> list[dict[str, Any]]:
+    announcements = fetch_announcements(stock)
+    events = filter_stock_report_events(stock, announcements)
+    events.extend(fetch_a_share_appointments(stock))
+    return events
 
 
 def collect_stock_events() -> list[dict[str, Any]]:
     stocks = load_stocks()
+    if not stocks:
+        return []
+
     collected: list[dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=min(STOCK_FETCH_WORKERS, len(stocks))) as executor:
+        for events in executor.map(collect_events_for_stock, stocks):
+            collected.extend(events)
 
-    for stock in stocks:
-        announcements = fetch_announcements(stock)
-        collected.extend(filter_stock_report_events(stock, announcements))
-        collected.extend(fetch_a_share_appointments(stock))
+    return dedupe_and_sort(collected)
 
-    return collected
 
+@contextlib.contextmanager
+def file_lock(path: Path, blocking: bool = True) -> Iterator[bool]:
+    # flock on a file in DATA_DIR, shared by every worker process; yields whether
+    # the lock was taken (always True when blocking).
+    if fcntl is None:
+        yield True
+        return
+
+    with open(path, "a") as handle:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(handle.fileno(), flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
 
-def refresh_cache() -> dict[str, Any]:
-    with CACHE_LOCK:
-        stock_events = collect_stock_events()
-        macro_events = fetch_macro_events()
-        events = dedupe_and_sort(stock_events + macro_events)
 
+def refresh_cache() -> dict[str, Any]:
+    # CACHE_LOCK keeps refreshes in this process from overlapping and the file
+    # lock does the same across workers, so a slow scheduled run cannot publish
+    # over a newer one triggered by a watchlist change.
+    with CACHE_LOCK, file_lock(REFRESH_LOCK_FILE):
+        # Macro fetching shares no state with the stock fan-out, so run it alongside.
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="macro-fetch") as executor:
+            macro_future = executor.submit(fetch_macro_events)
+            stock_events = collect_stock_events()
+            macro_events = macro_future.result()
+        # Both halves come out of dedupe_and_sort and their ids never overlap
+        # ("stock:" vs "macro:"/"macrof:"), so a stable merge replaces a re-sort.
+        events = list(heapq.merge(stock_events, macro_events, key=EVENT_SORT_KEY))
+
+        updated_epoch = int(time.time())
         payload = {
-            "updatedAt": datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
+            "updatedAt": datetime.fromtimestamp(updated_epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "updatedAtEpoch": updated_epoch,
             "events": events,
             "stats": {
                 "stockEventCount": len(stock_events),
@@ -1027,6 +1245,10 @@ def refresh_cache() -> dict[str, Any]:
         }
 
         save_cache(payload)
+        # Build the unfiltered /api/events bodies and the range-filter keys here
+        # rather than on the next request.
+        events_response_body(payload)
+        event_start_keys(events)
         logging.info(
             "Cache refreshed: total=%s stock=%s macro=%s",
             payload["stats"]["total"],
@@ -1036,10 +1258,16 @@ def refresh_cache() -> dict[str, Any]:
         return payload
 
 
-def ensure_cache(max_age_hours: int = 6) -> None:
+def ensure_cache(max_age_hours: int = REFRESH_INTERVAL_HOURS) -> None:
     cache = load_cache()
-    updated_at = cache.get("updatedAt")
+    updated_epoch = cache.get("updatedAtEpoch")
+    if isinstance(updated_epoch, (int, float)):
+        if time.time() - updated_epoch > max_age_hours * 3600:
+            refresh_cache()
+        return
 
+    # Caches written before updatedAtEpoch existed only carry the ISO timestamp.
+    updated_at = cache.get("updatedAt")
     if not updated_at:
         refresh_cache()
         return
@@ -1050,37 +1278,72 @@ def ensure_cache(max_age_hours: int = 6) -> None:
         refresh_cache()
         return
 
-    age = datetime.utcnow() - last.replace(tzinfo=None)
+    if last.tzinfo is None:
+        last = last.replace(tzinfo=timezone.utc)
+    age = datetime.now(timezone.utc) - last
     if age > timedelta(hours=max_age_hours):
         refresh_cache()
 
 
+def event_start_keys(events: list[dict[str, Any]]) -> list[str]:
+    global EVENT_START_KEYS
+
+    index = EVENT_START_KEYS
+    if index is None or index[0] is not events:
+        index = (events, [event["start"][:10] for event in events])
+        EVENT_START_KEYS = index
+    return index[1]
+
+
+def events_response_body(cache: dict[str, Any]) -> tuple[bytes, bytes, str]:
+    global EVENTS_BODY
+
+    body = EVENTS_BODY
+    if body is None or body[0] is not cache:
+        events = cache.get("events") or []
+        raw = orjson.dumps({"updatedAt": cache.get("updatedAt"), "count": len(events), "events": events})
+        # updatedAt only has whole seconds, so two refreshes can share it; hash the
+        # content instead, which also gives every worker the same validator.
+        etag = hashlib.blake2b(raw, digest_size=8).hexdigest()
+        body = (cache, raw, gzip.compress(raw, compresslevel=6), etag)
+        EVENTS_BODY = body
+    return body[1], body[2], body[3]
+
+
 def filter_events_by_range(
     events: list[dict[str, Any]],
     start_text: str | None,
     end_text: str | None,
 ) -> list[dict[str, Any]]:
-    start_date = parse_date(start_text) if start_text else None
-    end_date = parse_date(end_text) if end_text else None
+    # YYYY-MM-DD strings order the same as the dates, so no date objects are needed.
+    start_key = to_date_str(start_text) if start_text else None
+    end_key = to_date_str(end_text) if end_text else None
 
-    if not start_date and not end_date:
+    if not start_key and not end_key:
         return events
 
-    filtered = []
-    for event in events:
-        event_day = parse_date(event.get("start"))
-        if not event_day:
-            continue
-        if start_date and event_day < start_date:
-            continue
-        if end_date and event_day > end_date:
-            continue
-        filtered.append(event)
+    # Cached events are sorted by start, so the requested range is one contiguous slice.
+    keys = event_start_keys(events)
+    low = bisect_left(keys, start_key) if start_key else 0
+    high = bisect_right(keys, end_key) if end_key else len(keys)
+    return events[low:high]
+
 
-    return filtered
+# Responses are built straight from orjson's bytes instead of a str round-trip.
+class OrjsonProvider(JSONProvider):
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
 
 
 app = Flask(__name__, static_folder=str(STATIC_DIR), static_url_path="/static")
+app.json = OrjsonProvider(app)
 
 
 @app.route("/")
@@ -1092,18 +1355,40 @@ def index() -> Any:
 def api_events() -> Any:
     cache = load_cache()
     events = cache.get("events") or []
+    updated_at = cache.get("updatedAt")
+    # Every response for this cache generation is the same, so the hash of the
+    # unfiltered body validates the filtered ones too.
+    raw, compressed, etag = events_response_body(cache)
 
     start = request.args.get("start")
     end = request.args.get("end")
-    events = filter_events_by_range(events, start, end)
 
-    return jsonify(
-        {
-            "updatedAt": cache.get("updatedAt"),
-            "count": len(events),
-            "events": events,
-        }
-    )
+    if updated_at and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        filtered = filter_events_by_range(events, start, end)
+        if filtered is events:
+            if request.accept_encodings.quality("gzip") > 0:
+                response = Response(compressed, mimetype="application/json")
+                response.headers["Content-Encoding"] = "gzip"
+            else:
+                response = Response(raw, mimetype="application/json")
+        else:
+            response = jsonify(
+                {
+                    "updatedAt": updated_at,
+                    "count": len(filtered),
+                    "events": filtered,
+                }
+            )
+
+    response.vary.add("Accept-Encoding")
+    if updated_at:
+        # Weak, since the gzip and identity encodings share it.
+        response.set_etag(etag, weak=True)
+        # Revalidate on every use: a watchlist save refreshes the cache at any time.
+        response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 @app.route("/api/status")
@@ -1180,19 +1465,63 @@ def api_refresh() -> Any:
     )
 
 
-scheduler = BackgroundScheduler(timezone="UTC")
-scheduler.add_job(
-    refresh_cache,
-    trigger=IntervalTrigger(hours=6),
-    id="refresh_events_cache",
-    replace_existing=True,
-)
-scheduler.start()
-atexit.register(lambda: scheduler.shutdown(wait=False))
+REFRESH_STOP = threading.Event()
+
+
+def warm_cache() -> None:
+    # Parse the on-disk cache and build the response bodies/keys at startup, so
+    # the first request under a WSGI server does not pay for them. A malformed
+    # cache file must not stop the app from importing.
+    try:
+        cache = load_cache()
+        events_response_body(cache)
+        event_start_keys(cache.get("events") or [])
+    except Exception:
+        logging.exception("Cache warm-up failed")
+
+
+def catch_up_cache() -> None:
+    # Refresh a missing or stale cache off the import and request path. Workers
+    # started together skip it while one of them holds the lock, rather than each
+    # queueing a full refresh; it is a separate file from REFRESH_LOCK_FILE, which
+    # refresh_cache takes underneath.
+    try:
+        with file_lock(CATCH_UP_LOCK_FILE, blocking=False) as acquired:
+            if acquired:
+                ensure_cache()
+    except Exception:
+        logging.exception("Initial cache refresh failed")
+
+
+def refresh_loop(interval_seconds: float) -> None:
+    # One sleeping daemon thread; the fetches themselves fan out over the pools.
+    catch_up_cache()
+
+    while not REFRESH_STOP.wait(interval_seconds):
+        try:
+            refresh_cache()
+        except Exception:
+            logging.exception("Scheduled cache refresh failed")
+
+
+warm_cache()
+
+if AUTO_REFRESH:
+    refresh_thread = threading.Thread(
+        target=refresh_loop,
+        args=(REFRESH_INTERVAL_HOURS * 3600,),
+        name="refresh-events-cache",
+        daemon=True,
+    )
+    refresh_thread.start()
+    atexit.register(REFRESH_STOP.set)
+else:
+    # No periodic refresh here, but a fresh deployment still should not serve an
+    # empty calendar until the external timer first fires.
+    threading.Thread(target=catch_up_cache, name="catch-up-events-cache", daemon=True).start()
 
 
 if __name__ == "__main__":
-    ensure_cache()
     host = os.getenv("HOST", "localhost")
     port = int(os.getenv("PORT", "8000"))
     app.run(host=host, port=port, debug=False)
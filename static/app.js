@@ -131,7 +131,7 @@ function renderDetail(payload) {
 }
 
 async function fetchEvents() {
-  const response = await fetch("/api/events", { cache: "no-store" });
+  const response = await fetch("/api/events", { cache: "no-cache" });
   if (!response.ok) {
     throw new Error(`拉取事件失败: ${response.status}`);
   }